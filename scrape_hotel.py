@@ -1,27 +1,27 @@
 import asyncio
-import json
+import orjson
 from typing import Dict
-from httpx import AsyncClient, Response
-from parsel import Selector
+import lxml.html
+from lxml import etree
+from search_responses import close_client, get_client
 
-client = AsyncClient(
-    headers={
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
-        "Accept-Language": "en-US,en;q=0.9",
-    },
-    follow_redirects=True,
-    timeout=15.0
+# XPath expressions compiled once and evaluated against a single shared tree
+_XP_BASIC = etree.XPath("//script[contains(text(),'aggregateRating')]/text()")
+_XP_DESCRIPTION = etree.XPath(
+    "//div[contains(@class,'fIrGe')][contains(@class,'_T')]/text()"
 )
+_XP_AMENITY = etree.XPath("//div[contains(@data-test-target,'amenity')]/text()")
 
-def parse_hotel_page(result: Response) -> Dict:
+def parse_hotel_page(body: bytes) -> Dict:
     """parse hotel data from hotel pages"""
-    selector = Selector(result.text)
-    basic_data = json.loads(selector.xpath("//script[contains(text(),'aggregateRating')]/text()").get())
-    description = selector.css("div.fIrGe._T::text").get()
+    tree = lxml.html.fromstring(body)
+    # encode to plain bytes; orjson refuses lxml's smart-string type
+    basic_data = orjson.loads(_XP_BASIC(tree)[0].encode())
+    description = _XP_DESCRIPTION(tree)
+    description = description[0] if description else None
     amenities = []
-    for feature in selector.xpath("//div[contains(@data-test-target, 'amenity')]/text()"):
-        amenities.append(feature.get())
+    for feature in _XP_AMENITY(tree):
+        amenities.append(feature)
 
     return {
         "basic_data": basic_data,
@@ -32,9 +32,11 @@ def parse_hotel_page(result: Response) -> Dict:
 
 async def scrape_hotel(url: str) -> Dict:
     """Scrape hotel data and reviews"""
-    first_page = await client.get(url)
-    assert first_page.status_code == 200, "request is blocked"  # Ensure successful request
-    hotel_data = parse_hotel_page(first_page)
+    client = await get_client()
+    async with client.get(url) as first_page:
+        assert first_page.status == 200, "request is blocked"  # Ensure successful request
+        body = await first_page.read()
+    hotel_data = parse_hotel_page(body)
     print(f"scraped one hotel data")
     return hotel_data
 
@@ -43,9 +45,9 @@ async def run():
         url="https://www.tripadvisor.com/Hotel_Review-g190327-d264936-Reviews-1926_Hotel_Spa-Sliema_Island_of_Malta.html"
     )
     # print the result in JSON format
-    print(json.dumps(hotel_data, indent=2))
+    print(orjson.dumps(hotel_data, option=orjson.OPT_INDENT_2).decode())
     
-    await client.aclose()  # Ensure the client session is closed
+    await close_client()  # Ensure the client session is closed
 
 if __name__ == "__main__":
     asyncio.run(run())
@@ -1,59 +1,106 @@
 import asyncio
-import json
-import math
+import concurrent.futures
 import csv
-from typing import List, Dict, Optional
-from httpx import AsyncClient, Response
-from parsel import Selector
+from typing import Dict, List, NamedTuple, Optional
+import orjson
+import lxml.html
+from lxml import etree
 from loguru import logger as log
+from search_responses import close_client, get_client
 import re
 import os
 
-client = AsyncClient(
-    headers={
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
-        "Accept-Language": "en-US,en;q=0.9",
-    },
-    follow_redirects=True,
+_URL_HOTEL_RE = re.compile(r"Reviews-(.*?)-")
+_URL_CLEAN_RE = re.compile(r"[^A-Za-z0-9]+")
+
+# XPath expressions compiled once at import time
+_XP_BASIC = etree.XPath("//script[contains(text(),'aggregateRating')]/text()")
+_XP_DESCRIPTION = etree.XPath(
+    "//div[contains(@class,'fIrGe')][contains(@class,'_T')]/text()"
+)
+_XP_AMENITY = etree.XPath("//div[contains(@data-test-target,'amenity')]/text()")
+_XP_REVIEW_TITLE = etree.XPath(
+    ".//div[@data-test-target='review-title']/a/span/span/text()"
+)
+_XP_REVIEW_TEXT = etree.XPath(
+    ".//div[@class='_T FKffI bmUTE']/div[@class='fIrGe _T']/span[@class='orRIx Ci _a C ']"
+)
+_XP_REVIEW_RATE = etree.XPath(
+    ".//div[@data-test-target='review-rating']/svg/title/text()"
 )
+# candidate label spans; the 'Date of stay' match happens in Python
+_XP_REVIEW_TRIPDATE = etree.XPath(".//span/span")
 
+_PARSE_POOL: Optional[concurrent.futures.ProcessPoolExecutor] = None
 
-def parse_hotel_page(result: Response) -> Dict:
-    """parse hotel data from hotel pages"""
-    selector = Selector(result.text)
-    basic_data = json.loads(
-        selector.xpath("//script[contains(text(),'aggregateRating')]/text()").get()
-    )
-    description = selector.css("div.fIrGe._T::text").get()
-    amenities = []
-    for feature in selector.xpath(
-        "//div[contains(@data-test-target, 'amenity')]/text()"
-    ):
-        amenities.append(feature.get())
-    reviews = []
-    for review in selector.xpath("//div[@data-reviewid]"):
-        title = review.xpath(
-            ".//div[@data-test-target='review-title']/a/span/span/text()"
-        ).get()
-        text = review.xpath(
-            ".//div[@class='_T FKffI bmUTE']/div[@class='fIrGe _T']/span[@class='orRIx Ci _a C ']"
-        ).get()
-        text = re.sub(r'<[^>]+>', '', text).strip()
-        rate = review.xpath(
-            ".//div[@data-test-target='review-rating']/svg/title/text()"
-        ).get()
-        rate = (
-            rate.split(".")[0]
-            if rate
-            else None
+
+def _parse_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """create the parser pool on first use so importing this module
+    (e.g. in a spawned worker process) has no side effects"""
+    global _PARSE_POOL
+    if _PARSE_POOL is None:
+        _PARSE_POOL = concurrent.futures.ProcessPoolExecutor(
+            max_workers=os.cpu_count()
         )
-        trip_data = review.xpath(
-            ".//span[span[contains(text(),'Date of stay')]]/text()"
-        ).get().strip()
-        reviews.append(
-            {"title": title, "text": text, "rate": rate, "tripDate": trip_data}
+    return _PARSE_POOL
+
+
+async def fetch_page(url: str) -> bytes:
+    """fetch a raw page body over the shared aiohttp session"""
+    client = await get_client()
+    async with client.get(url) as response:
+        assert response.status == 200, "request is blocked"
+        return await response.read()
+
+
+class Review(NamedTuple):
+    """result record for a single hotel review"""
+
+    title: Optional[str]
+    text: str
+    rate: Optional[str]
+    tripDate: Optional[str]
+
+
+def _review_title(review) -> Optional[str]:
+    title = _XP_REVIEW_TITLE(review)
+    return title[0] if title else None
+
+
+def _review_text(review) -> str:
+    return _XP_REVIEW_TEXT(review)[0].text_content().strip()
+
+
+def _review_rate(review) -> Optional[str]:
+    rate = _XP_REVIEW_RATE(review)
+    return rate[0].split(".")[0] if rate else None
+
+
+def _review_trip_date(review) -> Optional[str]:
+    for label in _XP_REVIEW_TRIPDATE(review):
+        if (label.text or "").startswith("Date of stay"):
+            # the date itself is the text node following the label span
+            return (label.tail or "").strip()
+    return None
+
+
+def parse_hotel_page(body: bytes) -> Dict:
+    """parse hotel data from hotel pages"""
+    tree = lxml.html.fromstring(body)
+    # orjson rejects lxml's str subclass, so encode to plain bytes first
+    basic_data = orjson.loads(_XP_BASIC(tree)[0].encode())
+    description = _XP_DESCRIPTION(tree)
+    description = description[0] if description else None
+    amenities = list(_XP_AMENITY(tree))
+    reviews = [
+        Review(
+            title=_review_title(review),
+            text=_review_text(review),
+            rate=_review_rate(review),
+            tripDate=_review_trip_date(review),
         )
+        for review in tree.iterfind(".//div[@data-reviewid]")
+    ]
 
     return {
         "basic_data": basic_data,
@@ -65,32 +112,43 @@ def parse_hotel_page(result: Response) -> Dict:
 
 async def scrape_hotel_reviews(url: str, max_review_pages: Optional[int] = None) -> Dict:
     """Scrape hotel data and reviews"""
-    first_page = await client.get(url)
-    assert first_page.status_code == 200, "request is blocked"
+    first_page = await fetch_page(url)
     hotel_data = parse_hotel_page(first_page)
 
     # get the number of total review pages
     _review_page_size = 10
     total_reviews = int(hotel_data["basic_data"]["aggregateRating"]["reviewCount"])
-    total_review_pages = math.ceil(total_reviews / _review_page_size)
+    total_review_pages = (total_reviews + _review_page_size - 1) // _review_page_size
 
     # get the number of review pages to scrape
     if max_review_pages and max_review_pages < total_review_pages:
         total_review_pages = max_review_pages
 
     # scrape all review pages concurrently
+    prefix, _, suffix = url.partition("-Reviews-")
     review_urls = [
         # note: "or" stands for "offset reviews"
-        url.replace("-Reviews-", f"-Reviews-or{_review_page_size * i}-")
+        f"{prefix}-Reviews-or{_review_page_size * i}-{suffix}"
         for i in range(1, total_review_pages)
     ]
 
-    # fetch all review pages concurrently
-    tasks = [client.get(review_url) for review_url in review_urls]
-    responses = await asyncio.gather(*tasks)
+    # fetch review pages concurrently, at most 10 requests in flight
+    semaphore = asyncio.Semaphore(10)
+
+    async def fetch_review_page(review_url: str) -> bytes:
+        async with semaphore:
+            return await fetch_page(review_url)
 
-    for response in responses:
-        data = parse_hotel_page(response)
+    tasks = [fetch_review_page(review_url) for review_url in review_urls]
+
+    # hand each page to a parser process as soon as it lands
+    loop = asyncio.get_running_loop()
+    parse_tasks = []
+    for task in asyncio.as_completed(tasks):
+        body = await task
+        parse_tasks.append(loop.run_in_executor(_parse_pool(), parse_hotel_page, body))
+
+    for data in await asyncio.gather(*parse_tasks):
         hotel_data["reviews"].extend(data["reviews"])
 
     # print(f"scraped {len(hotel_data['reviews'])} reviews from {url}")
@@ -98,6 +156,21 @@ async def scrape_hotel_reviews(url: str, max_review_pages: Optional[int] = None)
     return hotel_data
 
 
+async def scrape_many_hotels(
+    urls: List[str],
+    max_concurrent: int = 5,
+    max_review_pages: Optional[int] = None,
+) -> List[Dict]:
+    """Scrape several hotels concurrently, at most max_concurrent at a time"""
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def scrape_one(url: str) -> Dict:
+        async with semaphore:
+            return await scrape_hotel_reviews(url, max_review_pages)
+
+    return await asyncio.gather(*(scrape_one(url) for url in urls))
+
+
 def save_to_csv(hotel_data: Dict, url: str) -> str:
     """Save hotel data to a CSV file in the 'datasets' folder."""
     
@@ -111,25 +184,20 @@ def save_to_csv(hotel_data: Dict, url: str) -> str:
     # Save the file in the 'datasets' folder
     filepath = os.path.join('datasets', filename)
     
-    with open(filepath, mode='w', newline='', encoding='utf-8') as file:
+    with open(
+        filepath, mode='w', newline='', encoding='utf-8', buffering=1024 * 1024
+    ) as file:
         writer = csv.writer(file)
         writer.writerow(["Title", "Text", "Rating", "Trip Date"])
-
-        for review in hotel_data["reviews"]:
-            writer.writerow([
-                review["title"],
-                review["text"],
-                review["rate"],
-                review["tripDate"],
-            ])
+        writer.writerows(hotel_data["reviews"])  # Review tuples iterate in field order
     
     log.success(f"Saved {len(hotel_data['reviews'])} reviews to {filename}")
     return filename
 
 def extract_hotel_name_from_url(url: str) -> str:
-    match = re.search(r'Reviews-(.*?)-', url)
+    match = _URL_HOTEL_RE.search(url)
     if match:
-        hotel_name = re.sub(r'[^A-Za-z0-9]+', '_', match.group(1))
+        hotel_name = _URL_CLEAN_RE.sub('_', match.group(1))
         return hotel_name.strip('-')
     return "hotel"
 
@@ -140,6 +208,8 @@ async def run():
     # Save the data to CSV
     save_to_csv(hotel_data, url)
 
+    await close_client()  # Ensure the client session is closed
+
 
 if __name__ == "__main__":
     asyncio.run(run())
@@ -1,13 +1,11 @@
 import asyncio
-import json
-import math
 from typing import List, Optional, TypedDict
 from urllib.parse import urljoin
 
-import httpx
+import orjson
 from loguru import logger as log
 from parsel import Selector
-from search_responses import scrape_location_data, client
+from search_responses import scrape_location_data, close_client, get_client
 import os
 import csv
 
@@ -17,19 +15,25 @@ class Preview(TypedDict):
     name: str
 
 
-def parse_search_page(response: httpx.Response) -> List[Preview]:
-    """parse result previews from TripAdvisor search page"""
-    log.info(f"parsing search page: {response.url}")
+async def fetch_page(url: str):
+    """fetch a raw page body over the shared aiohttp session"""
+    client = await get_client()
+    async with client.get(url) as response:
+        return await response.read(), str(response.url), response.status
+
+
+def parse_search_page(selector: Selector, page_url: str) -> List[Preview]:
+    """parse result previews from an already-parsed TripAdvisor search page"""
+    log.info(f"parsing search page: {page_url}")
     parsed = []
     # Search results are contain in boxes which can be in two locations.
     # this is location #1:
-    selector = Selector(response.text)
     for box in selector.css("span.listItem"):
         title = box.css("div[data-automation=hotel-card-title] a ::text").getall()[1]
         url = box.css("div[data-automation=hotel-card-title] a::attr(href)").get()
         parsed.append(
             {
-                "url": urljoin(str(response.url), url),  # turn url absolute
+                "url": urljoin(page_url, url),  # turn url absolute
                 "name": title,
             }
         )
@@ -40,7 +44,7 @@ def parse_search_page(response: httpx.Response) -> List[Preview]:
         parsed.append(
             {
                 "url": urljoin(
-                    str(response.url), box.xpath("@href").get()
+                    page_url, box.xpath("@href").get()
                 ),  # turn url absolute
                 "name": box.xpath("text()").get("").split(". ")[-1],
             }
@@ -53,7 +57,7 @@ async def scrape_search_hotel_urls(
 ) -> List[Preview]:
     # log.info(f"{query}: scraping first search results page")
     try:
-        location_data = (await scrape_location_data(query, client))[
+        location_data = (await scrape_location_data(query, await get_client()))[
             0
         ]  # take first result
     except IndexError:
@@ -63,17 +67,16 @@ async def scrape_search_hotel_urls(
     hotel_search_url = "https://www.tripadvisor.com" + location_data["HOTELS_URL"]
     log.success(f"found hotel search url: {hotel_search_url}")
 
-    first_page = await client.get(hotel_search_url)
-    if first_page.status_code != 200:
-        log.error(f"Scraper is being blocked. Status Code: {first_page.status_code}")
-        log.error(f"Response Content: {first_page.text}")
+    first_page, first_page_url, status = await fetch_page(hotel_search_url)
+    if status != 200:
+        log.error(f"Scraper is being blocked. Status Code: {status}")
+        log.error(f"Response Content: {first_page.decode(errors='replace')}")
         return []
 
-    # Create a Selector object to parse the response content
-    selector = Selector(text=first_page.text)
-
-    # Parse the first page
-    results = parse_search_page(first_page)
+    # Parse the response content once; the Selector is reused for the
+    # pagination metadata below
+    selector = Selector(body=first_page, type="html")
+    results = parse_search_page(selector, first_page_url)
     if not results:
         log.error(f"query {query} found no results")
         return []
@@ -84,7 +87,7 @@ async def scrape_search_hotel_urls(
     total_results = int(total_results.replace(",", ""))
     next_page_url = selector.css('a[aria-label="Next page"]::attr(href)').get()
     next_page_url = urljoin(hotel_search_url, next_page_url)  # turn url absolute
-    total_pages = int(math.ceil(total_results / page_size))
+    total_pages = (total_results + page_size - 1) // page_size
 
     if max_pages and total_pages > max_pages:
         log.debug(
@@ -100,11 +103,11 @@ async def scrape_search_hotel_urls(
         next_page_url.replace(f"oa{page_size}", f"oa{page_size * i}")
         for i in range(1, total_pages)
     ]
-    assert len(set(other_page_urls)) == len(other_page_urls)
 
-    to_scrape = [client.get(url) for url in other_page_urls]
+    to_scrape = [fetch_page(url) for url in other_page_urls]
     for response in asyncio.as_completed(to_scrape):
-        results.extend(parse_search_page(await response))
+        body, page_url, _ = await response
+        results.extend(parse_search_page(Selector(body=body, type="html"), page_url))
 
     log.success(f"Scraped {len(results)} search results for {query}")
 
@@ -134,6 +137,7 @@ if __name__ == "__main__":
         place = "Goa"
         result = await scrape_search_hotel_urls(place, max_pages=5)
         save_to_csv(result, f"{place}.csv")
-        print(json.dumps(result, indent=2))
+        print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
+        await close_client()  # Ensure the client session is closed
 
     asyncio.run(run())